@@ -1,7 +1,7 @@
 name = "pycromanager"
 
 from pycromanager.acquisition.java_backend_acquisitions import JavaBackendAcquisition, MagellanAcquisition, XYTiledAcquisition, ExploreAcquisition
-from pycromanager.acquisition.acquisition_superclass import multi_d_acquisition_events
+from pycromanager.acquisition.acquisition_superclass import multi_d_acquisition_events, multi_d_acquisition_events_iter
 from pycromanager.acquisition.acq_constructor import Acquisition
 from pycromanager.headless import start_headless, stop_headless
 from pycromanager.mm_java_classes import Studio, Magellan
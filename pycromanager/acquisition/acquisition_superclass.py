@@ -2,8 +2,8 @@
 Generic acquisition functionality used by both Python and Java backends
 """
 
-import copy
-import types
+import asyncio
+import itertools
 import numpy as np
 from typing import Union, List, Iterable
 import warnings
@@ -14,6 +14,7 @@ import weakref
 from pycromanager.acq_future import AcqNotification, AcquisitionFuture
 import os
 import threading
+from concurrent.futures import ThreadPoolExecutor
 from inspect import signature
 from typing import Generator
 from types import GeneratorType
@@ -25,14 +26,21 @@ from typing import Generator, Dict, Union
 class EventQueue(Queue):
     """
     A queue that can hold both events/lists of events and generators of events/lists of events. When a generator is
-    retrieved from the queue, it will be automatically expanded and its elements will be the output of queue.get
+    retrieved from the queue, it will be automatically expanded and its elements will be the output of queue.get.
+    The queue is unbounded by default, so put never blocks and can safely be called from within a coroutine
     """
     def __init__(self, maxsize=0):
         super().__init__(maxsize)
         self.current_generator: Union[Generator[Dict, None, None], None] = None
 
     def clear(self):
-        self.queue.clear()
+        # Drain through Queue.get rather than touching the underlying deque so that any producers
+        # blocked on a full queue get woken up
+        while True:
+            try:
+                super().get(block=False)
+            except queue.Empty:
+                break
         self.current_generator = None
 
     def put(self, item: Union[Dict, Generator[Dict, None, None]], block=True, timeout=None):
@@ -63,6 +71,30 @@ class EventQueue(Queue):
                 except StopIteration:
                     self.current_generator = None
 
+# Notifications for all Acquisitions are dispatched on a single asyncio event loop, which runs on a
+# daemon thread that is started the first time an Acquisition is created
+_notification_loop = None
+_notification_loop_lock = threading.Lock()
+
+def _get_notification_loop():
+    global _notification_loop
+    with _notification_loop_lock:
+        if _notification_loop is None:
+            _notification_loop = asyncio.new_event_loop()
+            threading.Thread(target=_notification_loop.run_forever, name="NotificationDispatcherThread",
+                             daemon=True).start()
+        return _notification_loop
+
+# Notifications are queued as (kind, notification) tuples, so the dispatcher can recognize the ones that
+# signal the end of an acquisition with an int comparison
+_KIND_OTHER = 0
+_KIND_ACQ_FIN = 1
+_KIND_SINK_FIN = 2
+_NOTIFICATION_KINDS = {
+    AcqNotification.Acquisition.ACQ_EVENTS_FINISHED: _KIND_ACQ_FIN,
+    AcqNotification.Image.DATA_SINK_FINISHED: _KIND_SINK_FIN,
+}
+
 class AcqAlreadyCompleteException(Exception):
     def __init__(self, message):
         self.message = message
@@ -127,7 +159,8 @@ class Acquisition(metaclass=Meta):
             include various stages of the control of hardware and the camera and saving of images. Notification
             callbacks will execute asynchronously with respect to the acquisition process. The supplied function
             should take a single argument, which will be an AcqNotification object. It should execute quickly,
-            so as to not back up the processing of other notifications.
+            so as to not back up the processing of other notifications. If it raises an exception, the acquisition
+            continues and the exception is raised from await_completion once the acquisition has shut down.
         image_saved_fn : Callable
             function that takes two arguments (the Axes of the image that just finished saving, and the Dataset)
             or three arguments (Axes, Dataset and the event_queue) and gets called whenever a new image is written to
@@ -155,48 +188,115 @@ class Acquisition(metaclass=Meta):
         self._finished = False
         self._exception = None
         self._napari_viewer = None
-        self._notification_queue = queue.Queue(100)
+        self._notification_loop = _get_notification_loop()
+        # The queue is created on the loop itself so that it is bound to it on all python versions. This is scheduled
+        # rather than waited on, so that constructing an Acquisition never blocks on the shared loop. Callbacks
+        # scheduled with call_soon_threadsafe run in order, so it will exist before any notification is enqueued
+        self._notification_queue = None
+        self._notification_loop.call_soon_threadsafe(self._create_notification_queue)
         self._image_notification_queue = queue.Queue(100)
-        self._acq_futures = []
+        # AcquisitionFutures are dropped automatically once user code no longer holds a reference to them
+        self._acq_futures = weakref.WeakSet()
+        self._acq_futures_lock = threading.Lock()
+        self._notification_callback_thread = None
+        self._notification_callback_exception = None
         self._image_process_fn = image_process_fn
+        # Check the signature once up front rather than on every image
+        self._process_fn_nargs = len(signature(image_process_fn).parameters) if image_process_fn is not None else 0
+        if image_process_fn is not None and self._process_fn_nargs not in (2, 3):
+            raise Exception("Incorrect number of arguments for image processing function, must be 2 or 3")
 
         pass
 
 
+    def _create_notification_queue(self):
+        # Runs on the notification loop
+        self._notification_queue = asyncio.Queue()
+
+    def _enqueue_notification(self, tagged_notification):
+        # Runs on the notification loop
+        self._notification_queue.put_nowait(tagged_notification)
+
+    def _post_notification(self, notification):
+        """
+        Pass a notification from the acquisition engine to the notification dispatcher. Can be called from any thread
+        """
+        kind = _NOTIFICATION_KINDS.get(notification.milestone, _KIND_OTHER)
+        self._notification_loop.call_soon_threadsafe(self._enqueue_notification, (kind, notification))
+
     def _start_notification_dispatcher(self, notification_callback_fn):
         """
-        Thread that runs a function that pulls notifications from the queueand dispatches
-        them to the appropriate listener
+        Schedule a coroutine on the shared notification loop that pulls notifications from the queue and dispatches
+        them to the appropriate listener. Returns a concurrent.futures.Future that completes once the final
+        notifications have been dispatched
         """
-        def dispatch_notifications():
+        if notification_callback_fn is not None:
+            # User code never runs on the shared loop, so that a slow callback can't hold up the notifications of
+            # other acquisitions. A single worker keeps callbacks in the order notifications arrived
+            callback_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="NotificationCallbackThread")
+
+            def run_callback(notification):
+                self._notification_callback_thread = threading.current_thread()
+                try:
+                    notification_callback_fn(notification)
+                except Exception as e:
+                    # Keep dispatching so the acquisition can shut down normally, and raise the first
+                    # exception from await_completion once cleanup is done
+                    if self._notification_callback_exception is None:
+                        self._notification_callback_exception = e
+
+            callback = lambda notification: callback_executor.submit(run_callback, notification)
+        else:
+            # substitute a no-op so the loop doesn't need to check for a callback on every notification
+            callback_executor = None
+            callback = lambda notification: None
+
+        async def dispatch_notifications():
             events_finished = False
             data_sink_finished = False
+            # local bindings for lookups made on every notification
+            notification_queue = self._notification_queue
+            queue_get = notification_queue.get
+            acq_futures = self._acq_futures
+            acq_futures_lock = self._acq_futures_lock
+            last_callback = None
             while True:
                 # dispatch notifications to all listeners
-                notification = self._notification_queue.get()
+                kind, notification = await queue_get()
 
-                if AcqNotification.is_acquisition_finished_notification(notification):
+                if kind == _KIND_ACQ_FIN:
                     events_finished = True
-                elif AcqNotification.is_data_sink_finished_notification(notification):
+                elif kind == _KIND_SINK_FIN:
                     data_sink_finished = True
                 # notify acquisition futures so they can stop blocking
-                for future in self._acq_futures:
-                    strong_ref = future()
-                    if strong_ref is not None:
-                        strong_ref._notify(notification)
+                with acq_futures_lock:
+                    futures = list(acq_futures)
+                for future in futures:
+                    future._notify(notification)
                 # alert user-specified notification callback
-                if notification_callback_fn is not None:
-                    notification_callback_fn(notification)
+                last_callback = callback(notification)
 
                 if events_finished and data_sink_finished:
                     break
+                # Queue.get returns without suspending when items are waiting, so explicitly yield to let the
+                # dispatchers of other acquisitions run during a burst
+                if not notification_queue.empty():
+                    await asyncio.sleep(0)
 
-        dispatcher_thread = threading.Thread(
-            target=dispatch_notifications,
-            name="NotificationDispatcherThread",
-        )
-        dispatcher_thread.start()
-        return dispatcher_thread
+            if callback_executor is not None:
+                # wait for the user callback to process the final notifications, without blocking the loop
+                await asyncio.wrap_future(last_callback)
+                callback_executor.shutdown(wait=False)
+
+        return asyncio.run_coroutine_threadsafe(dispatch_notifications(), self._notification_loop)
+
+    def _check_not_in_notification_callback(self):
+        """
+        The dispatcher waits for the notification callback to return before completing, so waiting on it from
+        within the callback would never return
+        """
+        if threading.current_thread() is self._notification_callback_thread:
+            raise RuntimeError("await_completion cannot be called from the acquisition's own notification callback")
 
     @abstractmethod
     def await_completion(self):
@@ -257,25 +357,23 @@ class Acquisition(metaclass=Meta):
         if isinstance(event_or_events, GeneratorType):
             acq_future = AcquisitionFuture(self)
 
-            def notifying_generator(original_generator):
-                # store in a weakref so that if user code doesn't hange on to AcqFuture
-                # it doesn't needlessly track events
-                acq_future_weakref = weakref.ref(acq_future)
+            def notifying_generator(original_generator, acq_future_weakref):
+                # only hold a weakref so that if user code doesn't hang on to AcqFuture
+                # it doesn't needlessly track events, and it can be dropped from self._acq_futures
                 for event in original_generator:
                     future = acq_future_weakref()
                     if future is not None:
-                        acq_future._monitor_axes(event['axes'])
+                        future._monitor_axes(event['axes'])
+                    # don't keep the future alive while suspended at the yield
+                    future = None
                     _validate_acq_events(event)
                     yield event
-            event_or_events = notifying_generator(event_or_events)
+            event_or_events = notifying_generator(event_or_events, weakref.ref(acq_future))
         else:
-            _validate_acq_events(event_or_events)
-            axes_or_axes_list = event_or_events['axes'] if type(event_or_events) == dict\
-                else [e['axes'] for e in event_or_events]
+            axes_or_axes_list = _validate_acq_events(event_or_events)
             acq_future = AcquisitionFuture(self, axes_or_axes_list)
-        self._acq_futures.append(weakref.ref(acq_future))
-        # clear out old weakrefs
-        self._acq_futures = [f for f in self._acq_futures if f() is not None]
+        with self._acq_futures_lock:
+            self._acq_futures.add(acq_future)
 
         self._event_queue.put(event_or_events)
         return acq_future
@@ -307,21 +405,14 @@ class Acquisition(metaclass=Meta):
         self._event_queue = EventQueue()
 
     def _call_image_process_fn(self, image, metadata):
-        params = signature(self._process_fn).parameters
         processed = None
-        if len(params) == 2 or len(params) == 3:
-            try:
-                if len(params) == 2:
-                    processed = self._process_fn(image, metadata)
-                elif len(params) == 3:
-                    processed = self._process_fn(image, metadata, self._event_queue)
-            except Exception as e:
-                self.abort(Exception("exception in image processor: {}".format(e)))
-
-        else:
-            self.abort(Exception(
-                "Incorrect number of arguments for image processing function, must be 2 or 3"
-            ))
+        try:
+            if self._process_fn_nargs == 2:
+                processed = self._process_fn(image, metadata)
+            else:
+                processed = self._process_fn(image, metadata, self._event_queue)
+        except Exception as e:
+            self.abort(Exception("exception in image processor: {}".format(e)))
         return processed
 
     ########  Context manager (i.e. "with Acquisition...") ###########
@@ -343,17 +434,25 @@ def _validate_acq_events(events: dict or list):
     ----------
     events : dict or list
 
+    Returns
+    -------
+    axes_or_axes_list : dict or list
+        The 'axes' of the event, or a list of the 'axes' of each event
     """
     if isinstance(events, dict):
         _validate_acq_dict(events)
+        return events['axes']
     elif isinstance(events, list):
         if len(events) == 0:
             raise Exception('events list cannot be empty')
+        axes_list = []
         for event in events:
             if isinstance(event, dict):
                 _validate_acq_dict(event)
+                axes_list.append(event['axes'])
             else:
                 raise Exception('events must be a dictionary or a list of dictionaries')
+        return axes_list
     else:
         raise Exception('events must be a dictionary or a list of dictionaries')
 
@@ -366,16 +465,18 @@ def _validate_acq_dict(event: dict):
     event : dict
 
     """
-    if 'axes' not in event.keys():
+    if 'axes' not in event:
         raise Exception('event dictionary must contain an \'axes\' key. This event will be ignored')
-    if 'row' in event.keys():
-        warnings.warn('adding \'row\' as a top level key in the event dictionary is deprecated and will be disallowed in '
-                      'a future version. Instead, add \'row\' as a key in the \'axes\' dictionary')
-        event['axes']['row'] = event['row']
-    if 'col' in event.keys():
-        warnings.warn('adding \'col\' as a top level key in the event dictionary is deprecated and will be disallowed in '
-                      'a future version. Instead, add \'column\' as a key in the \'axes\' dictionary')
-        event['axes']['column'] = event['col']
+    # deprecated top level keys, checked together so that the usual event (with neither) skips both fix-ups
+    if 'row' in event or 'col' in event:
+        if 'row' in event:
+            warnings.warn('adding \'row\' as a top level key in the event dictionary is deprecated and will be disallowed in '
+                          'a future version. Instead, add \'row\' as a key in the \'axes\' dictionary')
+            event['axes']['row'] = event['row']
+        if 'col' in event:
+            warnings.warn('adding \'col\' as a top level key in the event dictionary is deprecated and will be disallowed in '
+                          'a future version. Instead, add \'column\' as a key in the \'axes\' dictionary')
+            event['axes']['column'] = event['col']
 
     # TODO check for the validity of other acquisition event fields, and make sure that there aren't unexpected
     #   other fields, to help users catch simple errors
@@ -439,7 +540,48 @@ def multi_d_acquisition_events(
 
     Returns
     -------
-    events : dict
+    events : list
+    """
+    return list(multi_d_acquisition_events_iter(
+        num_time_points=num_time_points,
+        time_interval_s=time_interval_s,
+        z_start=z_start,
+        z_end=z_end,
+        z_step=z_step,
+        channel_group=channel_group,
+        channels=channels,
+        channel_exposures_ms=channel_exposures_ms,
+        xy_positions=xy_positions,
+        xyz_positions=xyz_positions,
+        position_labels=position_labels,
+        order=order,
+    ))
+
+
+def multi_d_acquisition_events_iter(
+    num_time_points: int=None,
+    time_interval_s: Union[float, List[float]]=0,
+    z_start: float=None,
+    z_end: float=None,
+    z_step: float=None,
+    channel_group: str=None,
+    channels: list=None,
+    channel_exposures_ms: list=None,
+    xy_positions: Iterable=None,
+    xyz_positions: Iterable=None,
+    position_labels: List[str]=None,
+    order: str="tpcz",
+):
+    """Generator version of multi_d_acquisition_events, which takes the same arguments. Events are generated
+    lazily as they are consumed instead of all being held in memory at once, so acquisition can begin before
+    the full set of events has been created. Arguments are validated immediately when this function is called.
+
+    Note that when a generator is passed to Acquisition.acquire, its events are submitted one at a time, so they
+    will not be merged into hardware sequences
+
+    Returns
+    -------
+    events : Generator
     """
     if xy_positions is not None and xyz_positions is not None:
         raise ValueError(
@@ -450,11 +592,16 @@ def multi_d_acquisition_events(
         raise ValueError(
             "This function requires that the xy position come earlier in the order than z"
         )
+    # minimum start time of each time point, or None if they should run as fast as possible
+    start_times = None
     if isinstance(time_interval_s, list):
         if len(time_interval_s) != num_time_points:
             raise ValueError(
                 "Length of time interval list should be equal to num_time_points"
             )
+        start_times = np.cumsum(time_interval_s)
+    elif time_interval_s != 0 and num_time_points is not None:
+        start_times = np.arange(num_time_points) * time_interval_s
     if position_labels is not None:
         if xy_positions is not None and len(xy_positions) != len(position_labels):
             raise ValueError("xy_positions and position_labels must be of equal length")
@@ -481,7 +628,10 @@ def multi_d_acquisition_events(
         z_positions = xyz_positions[:, 2][:, None]
 
     if has_zsteps:
-        z_rel = np.arange(z_start, z_end + z_step, z_step)
+        # Compute the number of steps explicitly rather than letting np.arange infer it from a float range,
+        # where rounding error can add an extra step past z_end (e.g. z_start=1, z_end=1.3, z_step=0.1)
+        num_z_steps = int(np.ceil((z_end - z_start) / z_step - 1e-9)) + 1
+        z_rel = z_start + z_step * np.arange(num_z_steps)
         if z_positions is None:
             z_positions = z_rel
             if xy_positions is not None:
@@ -489,85 +639,64 @@ def multi_d_acquisition_events(
                     z_positions, (xy_positions.shape[0], z_positions.shape[0])
                 )
         else:
-            pos = []
-            for z in z_positions:
-                pos.append(z + z_rel)
-            z_positions = np.asarray(pos)
+            # (N, 1) absolute z positions + (1, N_z) relative offsets -> (N, N_z)
+            z_positions = z_positions + z_rel[None, :]
 
     if position_labels is None and xy_positions is not None:
         position_labels = list(range(len(xy_positions)))
 
-    def generate_events(event, order):
-        if len(order) == 0:
-            yield event
-            return
-        elif order[0] == "t" and num_time_points is not None and num_time_points > 0:
-            time_indices = np.arange(num_time_points)
-            if isinstance(time_interval_s, list):
-                absolute_start_times = np.cumsum(time_interval_s)
-            for time_index in time_indices:
-                new_event = copy.deepcopy(event)
-                new_event["axes"]["time"] = time_index
-                if isinstance(time_interval_s, list):
-                    new_event["min_start_time"] = absolute_start_times[time_index]
-                else:
-                    if time_interval_s != 0:
-                        new_event["min_start_time"] = time_index * time_interval_s
-                yield generate_events(new_event, order[1:])
-        elif order[0] == "z" and z_positions is not None:
-            if "axes" in event and "position" in event["axes"]:
-                pos_idx = position_labels.index(event["axes"]["position"])
-                zs = z_positions[pos_idx]
+    # Store what each axis contributes to an event column-wise: for every axis in the requested order, its name in
+    # the 'axes' dict, its value at each step, and the other event fields set at each step. Axes that are not part
+    # of this acquisition are left out, so the cartesian product of the steps is the full set of events, and each
+    # event is only assembled once all of its steps are known
+    has_positions = "p" in order and xy_positions is not None
+    axis_names = []
+    axis_values = []
+    axis_fields = []
+    z_fields_by_position = None
+    for axis in order:
+        if axis == "t" and num_time_points is not None and num_time_points > 0:
+            axis_names.append("time")
+            axis_values.append(list(range(num_time_points)))
+            axis_fields.append([{} if start_times is None else {"min_start_time": start_times[i]}
+                                for i in range(num_time_points)])
+        elif axis == "z" and z_positions is not None:
+            axis_names.append("z")
+            if has_positions and z_positions.ndim == 2:
+                # z positions depend on the xy position, so they are filled in when the event is assembled
+                z_fields_by_position = [[{"z": z} for z in zs] for zs in z_positions]
+                axis_values.append(list(range(z_positions.shape[1])))
+                axis_fields.append([{}] * z_positions.shape[1])
             else:
-                zs = z_positions
-
-            for z_index, z in enumerate(zs):
-                new_event = copy.deepcopy(event)
-                new_event["axes"]["z"] = z_index
-                new_event["z"] = z
-                yield generate_events(new_event, order[1:])
-        elif order[0] == "p" and xy_positions is not None:
-            for p_label, xy in zip(position_labels, xy_positions):
-                new_event = copy.deepcopy(event)
-                new_event["axes"]["position"] = p_label
-                new_event["x"] = xy[0]
-                new_event["y"] = xy[1]
-                yield generate_events(new_event, order[1:])
-        elif order[0] == "c" and channel_group is not None and channels is not None:
-            for i in range(len(channels)):
-                new_event = copy.deepcopy(event)
-                new_event["config_group"] = [channel_group,  channels[i]]
-                new_event["axes"]["channel"] = channels[i]
-                if channel_exposures_ms is not None:
-                    new_event["exposure"] = channel_exposures_ms[i]
-                yield generate_events(new_event, order[1:])
-        else:
-            # this axis appears to be missing
-            yield generate_events(event, order[1:])
-
-    # collect all events into a single list
-    base_event = {"axes": {}}
-    events = []
-
-    def appender(next):
-        """
-
-        Parameters
-        ----------
-        next :
-
-
-        Returns
-        -------
-
-        """
-        if isinstance(next, types.GeneratorType):
-            for n in next:
-                appender(n)
-        else:
-            events.append(next)
-
-    appender(generate_events(base_event, order))
-    return events
-
+                axis_values.append(list(range(len(z_positions))))
+                axis_fields.append([{"z": z} for z in z_positions])
+        elif axis == "p" and xy_positions is not None:
+            axis_names.append("position")
+            axis_values.append(position_labels)
+            axis_fields.append([{"x": xy[0], "y": xy[1]} for xy in xy_positions])
+        elif axis == "c" and channel_group is not None and channels is not None:
+            axis_names.append("channel")
+            axis_values.append(channels)
+            channel_fields = [{"config_group": [channel_group, channel]} for channel in channels]
+            if channel_exposures_ms is not None:
+                for fields, exposure in zip(channel_fields, channel_exposures_ms):
+                    fields["exposure"] = exposure
+            axis_fields.append(channel_fields)
+
+    if z_fields_by_position is not None:
+        p_slot = axis_names.index("position")
+        z_slot = axis_names.index("z")
+    columns = list(zip(axis_names, axis_values, axis_fields))
+
+    def generate_events():
+        for combo in itertools.product(*[range(len(values)) for values in axis_values]):
+            axes = {}
+            event = {"axes": axes}
+            for (name, values, fields), i in zip(columns, combo):
+                axes[name] = values[i]
+                event.update(fields[i])
+            if z_fields_by_position is not None:
+                event.update(z_fields_by_position[combo[p_slot]][combo[z_slot]])
+            yield event
 
+    return generate_events()
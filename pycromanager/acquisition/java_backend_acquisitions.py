@@ -210,7 +210,7 @@ def _notification_handler_fn(acquisition, notification_push_port, connected_even
                         notification.payload = axes
                 acquisition._image_notification_queue.put(notification)
 
-            acquisition._notification_queue.put(notification)
+            acquisition._post_notification(notification)
             if AcqNotification.is_acquisition_finished_notification(notification):
                 events_finished = True
             elif AcqNotification.is_data_sink_finished_notification(notification):
@@ -285,7 +285,7 @@ class JavaBackendAcquisition(Acquisition, metaclass=NumpyDocstringInheritanceMet
                                                            args=[self._acq], port=self._port, new_socket=False,
                                                            timeout=self._timeout)
             self._acq_notification_recieving_thread = self._start_receiving_notifications()
-            self._acq_notification_dispatcher_thread = self._start_notification_dispatcher(notification_callback_fn)
+            self._acq_notification_dispatcher_future = self._start_notification_dispatcher(notification_callback_fn)
         # TODO: can remove this after this feature has been present for a while
         except:
             traceback.print_exc()
@@ -342,6 +342,7 @@ class JavaBackendAcquisition(Acquisition, metaclass=NumpyDocstringInheritanceMet
     ########  Public API methods with unique implementations for Java backend ###########
 
     def await_completion(self):
+        self._check_not_in_notification_callback()
         while not self._acq.are_events_finished() or (
                 self._acq.get_data_sink() is not None and not self._acq.get_data_sink().is_finished()):
             self._check_for_exceptions()
@@ -371,10 +372,12 @@ class JavaBackendAcquisition(Acquisition, metaclass=NumpyDocstringInheritanceMet
             # need to do this so its _Bridge can be garbage collected and a reference to the JavaBackendAcquisition
             # does not prevent Bridge cleanup and process exiting
             self._remote_notification_handler = None
-            self._acq_notification_dispatcher_thread.join()
+            self._acq_notification_dispatcher_future.result()
 
         self._acq = None
         self._finished = True
+        if self._notification_callback_exception is not None:
+            raise self._notification_callback_exception
 
 
     def get_viewer(self):
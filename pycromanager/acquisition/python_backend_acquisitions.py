@@ -76,14 +76,14 @@ class PythonBackendAcquisition(Acquisition, metaclass=NumpyDocstringInheritanceM
         # of this, the python backend does not have a separate thread for notifications because
         # it can just use the one in AcqEngPy
         def post_notification(notification):
-            self._notification_queue.put(notification)
+            self._post_notification(notification)
             # these are processed seperately to handle image saved callback
             if AcqNotification.is_image_saved_notification(notification):
                 self._image_notification_queue.put(notification)
 
         self._acq.add_acq_notification_listener(NotificationListener(post_notification))
 
-        self._notification_dispatch_thread = self._start_notification_dispatcher(notification_callback_fn)
+        self._notification_dispatch_future = self._start_notification_dispatcher(notification_callback_fn)
 
         # add hooks and image processor
         if pre_hardware_hook_fn is not None:
@@ -114,6 +114,7 @@ class PythonBackendAcquisition(Acquisition, metaclass=NumpyDocstringInheritanceM
 
     def await_completion(self):
         """Wait for acquisition to finish and resources to be cleaned up"""
+        self._check_not_in_notification_callback()
         while not self._acq.are_events_finished() or (
                 self._acq.get_data_sink() is not None and not self._acq.get_data_sink().is_finished()):
             self._check_for_exceptions()
@@ -122,10 +123,12 @@ class PythonBackendAcquisition(Acquisition, metaclass=NumpyDocstringInheritanceM
                 self._acq.get_data_sink().block_until_finished(0.05)
             self._check_for_exceptions()
         self._event_thread.join()
-        self._notification_dispatch_thread.join()
+        self._notification_dispatch_future.result()
 
         self._acq = None
         self._finished = True
+        if self._notification_callback_exception is not None:
+            raise self._notification_callback_exception
 
     def get_viewer(self):
         """
@@ -1,4 +1,5 @@
-from pycromanager import multi_d_acquisition_events
+from pycromanager import multi_d_acquisition_events, multi_d_acquisition_events_iter
+from types import GeneratorType
 import numpy as np
 import pytest
 
@@ -300,3 +301,30 @@ def test_channels():
         channel_group=channel_group,
         channel_exposures_ms=channel_exposures_ms,
     )
+
+
+def test_events_iter():
+    kwargs = dict(
+        num_time_points=2,
+        xyz_positions=xyz,
+        position_labels=labels,
+        z_start=-1,
+        z_end=1,
+        z_step=1,
+        channel_group="your-channel-group",
+        channels=["BF", "GFP"],
+        order="tpcz",
+    )
+    events = multi_d_acquisition_events_iter(**kwargs)
+    assert isinstance(events, GeneratorType)
+    assert list(events) == multi_d_acquisition_events(**kwargs)
+    # arguments are checked when the generator is created, not when it is first consumed
+    with pytest.raises(ValueError):
+        multi_d_acquisition_events_iter(xyz_positions=xyz, position_labels=labels[:-1])
+
+
+def test_z_steps_float_rounding():
+    # np.arange(1, 1.3 + 0.1, 0.1) includes an extra step past z_end due to floating point error
+    events = multi_d_acquisition_events(z_start=1, z_end=1.3, z_step=0.1)
+    assert [e["axes"]["z"] for e in events] == [0, 1, 2, 3]
+    assert np.allclose([e["z"] for e in events], [1, 1.1, 1.2, 1.3])
@@ -4,6 +4,7 @@ Tests for notification API and asynchronous acquisition API
 from pycromanager import multi_d_acquisition_events, Acquisition, AcqNotification
 import time
 import numpy as np
+import pytest
 
 # TODO: add tests for timing of blocking until different parts of the hardware sequence
 # def test_async_images_read(launch_mm_headless, setup_data_folder):
@@ -52,3 +53,30 @@ def test_async_images_read_sequence(launch_mm_headless, setup_data_folder):
     on_disk = [acq.get_dataset().read_image(time=t) for t in [7, 8, 9]]
     assert all([np.all(on_disk[i] == images[i]) for i in range(3)])
 
+
+def test_notification_callback(launch_mm_headless, setup_data_folder):
+    milestones = []
+    def callback(notification):
+        milestones.append(notification.milestone)
+
+    events = multi_d_acquisition_events(num_time_points=5)
+    with Acquisition(directory=setup_data_folder, show_display=False, notification_callback_fn=callback) as acq:
+        acq.acquire(events)
+
+    # all notifications have been delivered by the time the acquisition completes
+    assert milestones.count(AcqNotification.Image.IMAGE_SAVED) == 5
+    assert AcqNotification.Acquisition.ACQ_EVENTS_FINISHED in milestones
+    assert AcqNotification.Image.DATA_SINK_FINISHED in milestones
+
+def test_notification_callback_exception(launch_mm_headless, setup_data_folder):
+    def callback(notification):
+        raise ValueError("error in notification callback")
+
+    events = multi_d_acquisition_events(num_time_points=5)
+    with pytest.raises(ValueError):
+        with Acquisition(directory=setup_data_folder, show_display=False, notification_callback_fn=callback) as acq:
+            acq.acquire(events)
+
+    # the exception is only raised once the acquisition has finished and cleaned up
+    assert acq._finished
+    assert acq.get_dataset().read_image(time=4) is not None